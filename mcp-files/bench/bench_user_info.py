@@ -0,0 +1,270 @@
+"""Load test for the FastAPI and FastMCP user-info servers.
+
+Starts a local stand-in for the Beeceptor users API (generated users, optional
+artificial latency), points the servers at it through USER_API_URL and drives
+them with concurrent lookups: HTTP GET /users for the FastAPI app and stdio
+find_users tool calls for the FastMCP server. Reports latency percentiles,
+throughput and how many times the upstream was hit.
+
+Example:
+    python bench_user_info.py --target both --users 50000 --upstream-latency 200 \\
+        --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+MCP_FILES = Path(__file__).resolve().parents[1]
+FASTAPI_DIR = MCP_FILES / "non-mcp-use" / "fetch-user-info"
+FASTMCP_DIR = MCP_FILES / "mcp-use" / "fetch-user-info"
+# Largest limit GET /users accepts (MAX_PAGE_SIZE in the FastAPI server)
+MAX_LIMIT = 1000
+
+FIRST_NAMES = ["Raquel", "Flossie", "Bob", "Ann", "Maya", "Liam", "Noah", "Emma", "Olivia", "Ava",
+               "Lucas", "Mia", "Ethan", "Zoe", "Omar", "Ines", "Kenji", "Priya", "Sven", "Lena"]
+LAST_NAMES = ["Halvorson", "Maggio", "Smith", "Nguyen", "Garcia", "Kowalski", "Okafor", "Schmidt",
+              "Rossi", "Tanaka", "Silva", "Dubois", "Larsen", "Patel", "Murphy", "Cohen"]
+STREETS = ["Elm St", "Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Lake View", "Hill Ct"]
+STATES = ["California", "Texas", "Oregon", "Ohio", "Maine", "Utah", "Iowa", "Nevada"]
+
+
+def generate_users(count, seed=0):
+    """Users shaped like the Beeceptor payload."""
+    rng = random.Random(seed)
+    users = []
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        users.append({
+            "id": i,
+            "name": f"{first} {last}",
+            "company": f"{rng.choice(LAST_NAMES)} Group",
+            "username": f"{first}_{last}{i}",
+            "email": f"{first}_{last}{i}@example.com",
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "zip": f"{rng.randint(10000, 99999)}",
+            "state": rng.choice(STATES),
+            "country": "United States",
+            "phone": f"+1-555-{rng.randint(1000000, 9999999)}",
+        })
+    return users
+
+
+def generate_queries(users, count, seed=1):
+    """A mix of name, full-name, email and zip lookups for users that exist."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        user = rng.choice(users)
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append(user["name"].split()[0])
+        elif kind == 1:
+            queries.append(user["name"])
+        elif kind == 2:
+            queries.append(f"email:{user['email']}")
+        else:
+            queries.append(f"zip:{user['zip']}")
+    return queries
+
+
+class FakeUpstream:
+    """Serves a fixed user list over HTTP from a background thread and counts requests."""
+
+    def __init__(self, users, latency=0.0):
+        self.body = json.dumps(users).encode()
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with upstream._lock:
+                    upstream.calls += 1
+                if upstream.latency:
+                    time.sleep(upstream.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(upstream.body)))
+                self.end_headers()
+                self.wfile.write(upstream.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/users"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return float("nan")
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ErrorLog:
+    """Failed calls counted by exception type, keeping the first message of each type."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.examples = {}
+
+    def add(self, error):
+        kind = type(error).__name__
+        self.counts[kind] += 1
+        self.examples.setdefault(kind, str(error))
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def items(self):
+        return [(kind, (count, self.examples[kind])) for kind, count in self.counts.most_common()]
+
+
+def report(name, latencies, errors, elapsed, upstream_calls):
+    latencies = sorted(latencies)
+    ms = [percentile(latencies, p) * 1000 for p in (50, 95, 99)]
+    total = len(latencies) + errors.total()
+    print(f"\n== {name}")
+    print(f"requests:       {total} ({errors.total()} errors)")
+    for kind, (count, example) in errors.items():
+        print(f"  {count} x {kind}: {example}")
+    print(f"throughput:     {total / elapsed:.1f} req/s over {elapsed:.2f}s")
+    print(f"latency p50/p95/p99: {ms[0]:.1f} / {ms[1]:.1f} / {ms[2]:.1f} ms")
+    print(f"upstream calls: {upstream_calls}")
+
+
+async def drive(queries, concurrency, call):
+    """Run call(query) for every query with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = ErrorLog()
+
+    async def one(query):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(query)
+            except Exception as e:
+                errors.add(e)
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    return latencies, errors, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def bench_fastapi(upstream, queries, args, env):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=FASTAPI_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            for _ in range(100):
+                try:
+                    await client.get("/docs")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("FastAPI server did not start")
+
+            async def call(query):
+                resp = await client.get("/users", params={"search": query, "limit": args.limit})
+                resp.raise_for_status()
+
+            calls_before = upstream.calls
+            latencies, errors, elapsed = await drive(queries, args.concurrency, call)
+            report("FastAPI GET /users", latencies, errors, elapsed, upstream.calls - calls_before)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+async def bench_fastmcp(upstream, queries, args, env):
+    params = StdioServerParameters(command=sys.executable, args=[str(FASTMCP_DIR / "server.py")],
+                                   env=env, cwd=FASTMCP_DIR)
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def call(query):
+                result = await session.call_tool("find_users", {"search": query, "limit": args.limit})
+                if result.isError:
+                    raise RuntimeError(result.content)
+
+            calls_before = upstream.calls
+            latencies, errors, elapsed = await drive(queries, args.concurrency, call)
+            report("FastMCP find_users (stdio)", latencies, errors, elapsed, upstream.calls - calls_before)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the user-info servers against a local fake upstream.")
+    parser.add_argument("--target", choices=["fastapi", "mcp", "both"], default="both")
+    parser.add_argument("--users", type=int, default=1000, help="Users served by the fake upstream")
+    parser.add_argument("--upstream-latency", type=float, default=100, help="Fake upstream delay in ms")
+    parser.add_argument("--requests", type=int, default=1000, help="Lookups per server")
+    parser.add_argument("--concurrency", type=int, default=50, help="Lookups in flight at once")
+    parser.add_argument("--limit", type=int, default=10, help="limit passed with each lookup")
+    parser.add_argument("--cache-ttl", type=float, default=30, help="USER_CACHE_TTL for the servers")
+    args = parser.parse_args()
+    if not 1 <= args.limit <= MAX_LIMIT:
+        parser.error(f"--limit must be between 1 and {MAX_LIMIT}")
+    for name in ("users", "requests", "concurrency"):
+        if getattr(args, name) < 1:
+            parser.error(f"--{name} must be at least 1")
+
+    users = generate_users(args.users)
+    queries = generate_queries(users, args.requests)
+    with FakeUpstream(users, latency=args.upstream_latency / 1000) as upstream:
+        env = dict(os.environ, USER_API_URL=upstream.url, USER_CACHE_TTL=str(args.cache_ttl))
+        print(f"fake upstream: {upstream.url} ({args.users} users, {args.upstream_latency:.0f} ms latency)")
+        if args.target in ("fastapi", "both"):
+            await bench_fastapi(upstream, queries, args, env)
+        if args.target in ("mcp", "both"):
+            await bench_fastmcp(upstream, queries, args, env)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,28 +1,157 @@
-import asyncio
-from langchain_ollama import ChatOllama
-from mcp_use import MCPAgent, MCPClient
-
-async def main():
-    client = MCPClient(config={
-    "mcpServers": {
-        "myServer": {
-            "command": "uv",
-            "args": [
-                "--directory", "C:/MCP Files/server",
-                "run", "mcp_server.py"
-            ],
-            "env": {
-                "PYTHONUNBUFFERED": "1"
-            }
-        }
-    }
-})
-    # Create LLM
-    llm = ChatOllama(model="llama2", base_url="http://localhost:11434")
-    # Create agent with tools
-    agent = MCPAgent(llm=llm, client=client, max_steps=30)
-    # Run the query
-    result = await agent.run("Find the user information of specific user from an external mock API (https://fake-json-api.mock.beeceptor.com/users), which returns informations for a list of users")
-
-if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from langchain_ollama import ChatOllama
+from mcp_use import MCPAgent, MCPClient
+
+# Directory holding the users_server script started through `uv run`
+SERVER_DIR = Path(__file__).resolve().parent
+DEFAULT_QUERY = "Find the user information of specific user from an external mock API (https://fake-json-api.mock.beeceptor.com/users), which returns informations for a list of users"
+# Queries answered at the same time; one warm agent is kept per slot
+MAX_CONCURRENCY = 4
+MAX_STEPS = 30
+
+
+def make_client(server_dir=SERVER_DIR, server_script="server.py"):
+    return MCPClient(config={
+    "mcpServers": {
+        "myServer": {
+            "command": "uv",
+            "args": [
+                "--directory", str(server_dir),
+                "run", server_script
+            ],
+            "env": {
+                "PYTHONUNBUFFERED": "1"
+            }
+        }
+    }
+})
+
+
+class AgentPool:
+    """Keeps one MCP server session and a set of initialized agents warm across queries.
+
+    The server is spawned and the MCP handshake done once in start(); every
+    query afterwards reuses that session, so its cost is only the model calls.
+    """
+
+    def __init__(self, client, llm, concurrency=MAX_CONCURRENCY, max_steps=MAX_STEPS):
+        self.client = client
+        self.llm = llm
+        self.concurrency = concurrency
+        self.max_steps = max_steps
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.agents = asyncio.Queue()
+
+    async def start(self):
+        await self.client.create_all_sessions()
+        for _ in range(self.concurrency):
+            # No memory: agents are shared between unrelated queries
+            agent = MCPAgent(llm=self.llm, client=self.client, max_steps=self.max_steps, memory_enabled=False)
+            await agent.initialize()
+            self.agents.put_nowait(agent)
+
+    async def close(self):
+        await self.client.close_all_sessions()
+
+    async def run(self, query):
+        """Answer one query; returns a dict with the result, step count and latency."""
+        async with self.semaphore:
+            agent = await self.agents.get()
+            start = time.perf_counter()
+            steps = 0
+            result = None
+            error = None
+            try:
+                async for item in agent.stream(query, manage_connector=False):
+                    if isinstance(item, tuple):
+                        # (AgentAction, observation) for each tool call
+                        steps += 1
+                    else:
+                        result = item
+            except Exception as e:
+                error = e
+            finally:
+                self.agents.put_nowait(agent)
+            return {
+                "query": query,
+                "result": result,
+                "error": error,
+                "steps": steps,
+                "latency": time.perf_counter() - start,
+            }
+
+
+def report(outcome):
+    status = f"error: {outcome['error']}" if outcome["error"] else outcome["result"]
+    print(f"[{outcome['steps']} steps, {outcome['latency']:.2f}s] {outcome['query']}\n  -> {status}")
+
+
+async def run_batch(pool, queries):
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(pool.run(q)) for q in queries]
+    for task in asyncio.as_completed(tasks):
+        report(await task)
+    elapsed = time.perf_counter() - start
+    print(f"{len(queries)} queries in {elapsed:.2f}s ({len(queries) / elapsed:.2f} queries/s)")
+
+
+async def run_interactive(pool):
+    """Read questions until exit/quit/EOF; each is answered in the background as soon as a slot is free."""
+    pending = set()
+
+    async def answer(query):
+        report(await pool.run(query))
+
+    while True:
+        try:
+            query = await asyncio.to_thread(input, "You: ")
+        except EOFError:
+            break
+        if query.lower() in ["exit", "quit"]:
+            break
+        if query.strip():
+            task = asyncio.create_task(answer(query))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Ask the users_server MCP agent one or more questions.")
+    parser.add_argument("queries", nargs="*", help="Questions to answer concurrently")
+    parser.add_argument("-f", "--file", help="File with one question per line ('-' for stdin)")
+    parser.add_argument("-i", "--interactive", action="store_true", help="Read questions interactively")
+    parser.add_argument("-c", "--concurrency", type=int, default=MAX_CONCURRENCY, help="Queries run at the same time")
+    parser.add_argument("--server-dir", default=str(SERVER_DIR), help="Directory containing the MCP server script")
+    args = parser.parse_args()
+
+    queries = list(args.queries)
+    if args.file == "-":
+        queries += [line.strip() for line in sys.stdin if line.strip()]
+    elif args.file:
+        with open(args.file, encoding="utf-8") as lines:
+            queries += [line.strip() for line in lines if line.strip()]
+    if not queries and not args.interactive:
+        queries = [DEFAULT_QUERY]
+
+    # Create LLM
+    llm = ChatOllama(model="llama2", base_url="http://localhost:11434")
+    pool = AgentPool(make_client(args.server_dir), llm, concurrency=max(1, args.concurrency))
+    try:
+        start = time.perf_counter()
+        await pool.start()
+        print(f"MCP session ready in {time.perf_counter() - start:.2f}s")
+        if queries:
+            await run_batch(pool, queries)
+        if args.interactive:
+            await run_interactive(pool)
+    finally:
+        await pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,37 +1,56 @@
-from typing import Any, List, Dict
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Annotated, Any, AsyncIterator, List, Dict, Optional
 import httpx
 from mcp.server.fastmcp import FastMCP, Context
+from pydantic import Field
+
+# The user cache and search index are shared with the FastAPI server
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
+from user_cache import UserCache
+from user_index import project
+
+API_URL = os.getenv("USER_API_URL", "https://fake-json-api.mock.beeceptor.com/users")
+API_TIMEOUT = float(os.getenv("USER_API_TIMEOUT", "15"))
+CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[UserCache]:
+    async with httpx.AsyncClient(timeout=API_TIMEOUT) as client:
+        yield UserCache(client, API_URL, CACHE_TTL)
 
-API_URL = "https://fake-json-api.mock.beeceptor.com/users"
 
 # Create the MCP server instance
-mcp = FastMCP("users_server")
+mcp = FastMCP("users_server", lifespan=lifespan)
 
 @mcp.tool()
-async def find_users(ctx: Context, search: str = "") -> List[Dict[str, Any]]:
+async def find_users(
+    ctx: Context,
+    search: str = "",
+    fields: Optional[List[str]] = None,
+    limit: Optional[Annotated[int, Field(ge=1)]] = None,
+) -> List[Dict[str, Any]]:
     """
-    Fetch users from the Beeceptor mock API and optionally filter by name substring.
+    Fetch users from the Beeceptor mock API and optionally filter them.
 
     Args:
-        search: Optional case-insensitive substring to match within the user's name.
+        search: Optional case-insensitive text matched against the user's name, email, address and
+            company. Every word must match. Prefix a word with name:, email:, address:, zip: or company: to search
+            only that field, and quote values containing spaces (e.g. name:"Raquel Halvorson").
+        fields: Optional list of user attributes to return (e.g. ["name", "email"]). Only ask for
+            the attributes you need; all attributes are returned when omitted.
+        limit: Optional maximum number of users to return (at least 1), best matches first.
 
     Returns:
-        A list of user objects (JSON) matching the filter. If search is empty, returns all users.
+        A list of user objects (JSON) matching the filter, reduced to `fields` when given.
+        If search is empty, returns all users (up to `limit`).
     """
-    await ctx.info("Fetching users from Beeceptor Fake JSON API...")
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(API_URL)
-        resp.raise_for_status()
-        data = resp.json()
-
-    if not isinstance(data, list):
-        raise ValueError("Unexpected response format: expected a JSON list")
-
-    if not search:
-        return data
-
-    s = search.lower()
-    return [u for u in data if s in str(u.get("name", "")).lower()]
+    await ctx.info("Searching users from Beeceptor Fake JSON API...")
+    cache: UserCache = ctx.request_context.lifespan_context
+    return project(await cache.search(search, limit=limit), fields)
 
 if __name__ == "__main__":
     # Run the MCP server over stdio (required for MCP clients like mcp-use)
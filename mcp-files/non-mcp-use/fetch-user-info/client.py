@@ -1,13 +1,135 @@
 # mcp_client.py
 import requests
 import json
+import re
+import time
+
+from router import Router
 
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL = "llama2"
+USER_INFO_URL = "http://localhost:8000/users"
+# Seconds to wait for the user_info server
+USER_INFO_TIMEOUT = 10
+# Seconds to wait for Ollama to connect / send the next chunk
+OLLAMA_TIMEOUT = 120
+# Print time-to-first-token and tokens/sec after each model call
+SHOW_STATS = True
+
+# One pooled HTTP session reused for every call
+session = requests.Session()
+
+# Upper bound on the user data put into the final prompt (rough estimate: ~4 chars per token)
+CONTEXT_TOKEN_BUDGET = 1000
+# Most users fetched as candidates for the final prompt
+MAX_CONTEXT_USERS = 10
+
+# Words in the question that never identify a user
+STOPWORDS = {
+    "a", "about", "all", "an", "and", "any", "are", "as", "at", "by", "can", "could", "details", "do", "does", "find", "for", "from",
+    "get", "give", "has", "have", "he", "her", "his", "how", "i", "in", "info", "information", "into", "is", "it",
+    "know", "list", "many", "me", "my", "named", "of", "on", "please", "provide", "show", "she", "tell", "the",
+    "their", "them", "they", "to", "user", "users", "want", "was", "what", "whats", "what's",
+    "where", "which", "who", "whom", "whose", "with", "would", "you",
+}
+# User attribute -> question words asking for it
+FIELD_KEYWORDS = {
+    "email": ("email", "e-mail", "mail"),
+    "address": ("address", "live", "lives", "located", "location", "street", "where"),
+    "zip": ("zip", "zipcode", "postal", "pincode"),
+    "state": ("state",),
+    "country": ("country",),
+    "phone": ("phone", "mobile", "number", "contact"),
+    "company": ("company", "employer", "work", "works"),
+    "username": ("username", "handle"),
+}
+# Attributes sent when the question doesn't ask for any in particular
+DEFAULT_FIELDS = ["name", "email", "address", "zip", "phone", "company"]
+
+class JsonObjectEnd:
+    """Fed tokens one by one, returns True once a complete top-level JSON object has been seen."""
 
-def call_ollama(prompt):
-    res = requests.post(OLLAMA_URL, json={"model": MODEL, "prompt": prompt, "stream": False})
-    return res.json().get("response")
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def __call__(self, token):
+        for ch in token:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.started:
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+                self.started = True
+            elif ch == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+def call_ollama(prompt, echo=False, stop_when=None):
+    """Stream a completion from Ollama and return its full text.
+
+    echo prints tokens as they arrive. stop_when is called with each token and
+    stops reading the stream as soon as it returns True. Returns None (after
+    printing why) if the request fails or Ollama reports an error.
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    tokens = 0
+    parts = []
+    payload = {"model": MODEL, "prompt": prompt, "stream": True}
+    error = None
+    try:
+        with session.post(OLLAMA_URL, json=payload, stream=True, timeout=OLLAMA_TIMEOUT) as res:
+            if res.status_code != 200:
+                # Ollama explains failures (e.g. a missing model) in a JSON "error" field
+                try:
+                    error = res.json().get("error")
+                except ValueError:
+                    pass
+                error = f"HTTP {res.status_code}: {error or res.text[:200]}"
+            else:
+                for line in res.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        error = chunk["error"]
+                        break
+                    token = chunk.get("response", "")
+                    if token:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        tokens += 1
+                        parts.append(token)
+                        if echo:
+                            print(token, end="", flush=True)
+                        if stop_when and stop_when(token):
+                            break
+                    if chunk.get("done"):
+                        break
+    except (requests.RequestException, ValueError) as e:
+        error = str(e)
+
+    if echo:
+        print()
+    if error is not None:
+        print("Ollama request failed:", error)
+        return None
+    if SHOW_STATS and first_token_at is not None:
+        elapsed = time.perf_counter() - first_token_at
+        rate = tokens / elapsed if elapsed > 0 else float("inf")
+        print(f"[ttft {first_token_at - start:.2f}s, {rate:.1f} tok/s, {tokens} tokens]")
+    return "".join(parts)
 
 def determine_action(user_input):
     prompt = f"""
@@ -24,45 +146,117 @@ Return your answer in this JSON format:
 
 User: {user_input}
 """
-    response = call_ollama(prompt)
+    # Stop reading as soon as the JSON object is complete
+    response = call_ollama(prompt, stop_when=JsonObjectEnd())
+    if response is None:
+        return None
     try:
-        return json.loads(response)
-    except:
+        # The last token may carry text after the closing brace; decode just the object
+        decision, _ = json.JSONDecoder().raw_decode(response, response.index("{"))
+        return decision
+    except ValueError:
         print("Failed to parse LLM response:", response)
         return None
 
-def fetch_from_mcp_server(server):
+def extract_search_terms(question):
+    """Words of the question that could identify a user (names, emails, zip codes...)."""
+    keywords = {k for words in FIELD_KEYWORDS.values() for k in words}
+    words = re.findall(r"[\w@.+'-]+", question.lower().replace("\u2019", "'"))
+    # Drop possessives: "Halvorson's" -> "halvorson"
+    terms = [re.sub(r"'s$", "", w.strip(".-")).strip("'") for w in words]
+    terms = [t for t in terms if len(t) > 1 and t not in STOPWORDS and t not in keywords]
+    # Words under 3 characters can't use the server's trigram index and match far too
+    # many users, so they are only used when nothing longer is left (e.g. "Bo Li")
+    long_terms = [t for t in terms if len(t) >= 3]
+    return long_terms or terms
+
+def build_search(terms):
+    """Search string for match=any: each term, plus the whole phrase so users containing it rank first."""
+    search = " ".join(terms)
+    if len(terms) > 1:
+        search += f' "{search}"'
+    return search
+
+def relevant_fields(question):
+    """User attributes the question asks about; name is always kept to identify the user."""
+    words = set(re.findall(r"[\w-]+", question.lower()))
+    fields = [field for field, keywords in FIELD_KEYWORDS.items() if words & set(keywords)]
+    return ["name"] + fields if fields else DEFAULT_FIELDS
+
+def build_context(users, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Compact JSON for the users (best matches first) that fit in the token budget.
+
+    A user that doesn't fit in what is left of the budget is skipped, so a single
+    oversized record can't blow past it.
+    """
+    lines = []
+    used = 0
+    for user in users:
+        line = json.dumps(user, separators=(",", ":"))
+        cost = len(line) // 4 + 1
+        if used + cost > token_budget:
+            continue
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+def fetch_from_mcp_server(server, question):
     if server == "user_info":
-        res = requests.get("http://localhost:8000/users")
+        terms = extract_search_terms(question)
+        if not terms:
+            # Nothing in the question identifies a user; arbitrary users would only mislead the model
+            return {"results": []}
+        params = {
+            "search": build_search(terms),
+            "match": "any",
+            "fields": ",".join(relevant_fields(question)),
+            "limit": MAX_CONTEXT_USERS,
+        }
+        try:
+            res = session.get(USER_INFO_URL, params=params, timeout=USER_INFO_TIMEOUT)
+        except requests.RequestException as e:
+            return {"error": f"user_info request failed: {e}"}
+        if res.status_code != 200:
+            return {"error": f"user_info returned {res.status_code}: {res.text[:200]}"}
         return res.json()
     return {"error": "Unknown server"}
 
-def generate_final_response(question, data):
+def generate_final_response(question, data, echo=False):
+    context = build_context(data["results"]) or "(no matching users)"
     prompt = f"""
 You are a chatbot. The user asked: "{question}"
-Here is the data retrieved from the API: {data}
+Here is the data retrieved from the API, one user per line, best matches first:
+{context}
 Use the data to answer the user in a friendly, helpful way.
 """
-    return call_ollama(prompt)
+    return call_ollama(prompt, echo=echo)
 
 def main():
+    # Keyword rules and cached past decisions first, the LLM only when both miss
+    router = Router(determine_action)
     while True:
         user_input = input("You: ")
         if user_input.lower() in ["exit", "quit"]:
             break
 
-        # Step 1: Get LLM decision
-        decision = determine_action(user_input)
+        # Step 1: Pick the target server
+        start = time.perf_counter()
+        decision = router.route(user_input)
+        if SHOW_STATS:
+            print(f"[route via {router.last_tier}: {(time.perf_counter() - start) * 1e6:.0f}us]")
         if not decision:
             print("Couldn't understand the command.")
             continue
 
         # Step 2: Call appropriate MCP server
-        data = fetch_from_mcp_server(decision['target_server'])
+        data = fetch_from_mcp_server(decision['target_server'], user_input)
+        if "error" in data:
+            print("Couldn't fetch data:", data["error"])
+            continue
 
-        # Step 3: Ask LLM to generate final response
-        final_response = generate_final_response(user_input, data)
-        print("Bot:", final_response)
+        # Step 3: Ask LLM to generate final response, printing it as it streams
+        print("Bot: ", end="", flush=True)
+        generate_final_response(user_input, data, echo=True)
 
 if __name__ == "__main__":
     main()
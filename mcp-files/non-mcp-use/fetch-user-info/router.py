@@ -0,0 +1,89 @@
+# router.py
+import re
+from collections import OrderedDict
+
+# Server -> question words that route straight to it without asking the LLM
+SERVER_KEYWORDS = {
+    "user_info": (
+        "user", "users", "who", "whose", "email", "e-mail", "mail", "address", "live", "lives",
+        "zip", "zipcode", "postal", "phone", "contact", "company", "username", "name",
+    ),
+}
+
+
+def tokenize(question):
+    return frozenset(re.findall(r"[\w@.'-]+", question.lower()))
+
+
+class Router:
+    """Picks the target server for a question, cheapest tier first.
+
+    1. Keyword rules: the question mentions words belonging to exactly one server.
+    2. Similarity cache: a previous question with enough word overlap (Jaccard)
+       was already routed; entries are evicted least recently used first.
+    3. The LLM, via llm_route(question). Its answer is only accepted (and
+       cached) if it names a known server; anything else fails immediately.
+    """
+
+    def __init__(self, llm_route, server_keywords=SERVER_KEYWORDS, cache_size=256, similarity=0.6):
+        self.llm_route = llm_route
+        self.server_keywords = {server: set(words) for server, words in server_keywords.items()}
+        self.cache_size = cache_size
+        self.similarity = similarity
+        self.cache = OrderedDict()
+        # Which tier answered the last route() call: "rules", "cache", "llm" or None
+        self.last_tier = None
+
+    def route(self, question):
+        tokens = tokenize(question)
+
+        decision = self._match_rules(tokens)
+        if decision:
+            self.last_tier = "rules"
+            return decision
+
+        decision = self._match_cache(tokens)
+        if decision:
+            self.last_tier = "cache"
+            return decision
+
+        decision = self.llm_route(question)
+        if not isinstance(decision, dict) or decision.get("target_server") not in self.server_keywords:
+            # llm_route reports unparseable answers itself; only flag parsed ones with the wrong shape
+            if isinstance(decision, dict):
+                print("LLM returned an invalid routing decision:", decision)
+            self.last_tier = None
+            return None
+        self.last_tier = "llm"
+        self._remember(tokens, decision)
+        return decision
+
+    def _match_rules(self, tokens):
+        hits = [server for server, words in self.server_keywords.items() if tokens & words]
+        if len(hits) == 1:
+            return {"action": "lookup", "target_server": hits[0]}
+        return None
+
+    def _match_cache(self, tokens):
+        if not tokens:
+            return None
+        best_key, best_score = None, 0.0
+        if tokens in self.cache:
+            best_key, best_score = tokens, 1.0
+        else:
+            for key in self.cache:
+                score = len(tokens & key) / len(tokens | key)
+                if score > best_score:
+                    best_key, best_score = key, score
+        if best_key is None or best_score < self.similarity:
+            return None
+        self.cache.move_to_end(best_key)
+        return self.cache[best_key]
+
+    def _remember(self, tokens, decision):
+        if not tokens:
+            return
+        self.cache[tokens] = decision
+        self.cache.move_to_end(tokens)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
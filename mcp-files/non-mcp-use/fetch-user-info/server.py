@@ -1,9 +1,67 @@
 # mcp_server.py
-from fastapi import FastAPI, Request
-import requests
+import base64
+import binascii
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# The user cache and search index are shared with the FastMCP server
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
+from user_cache import UserCache
+from user_index import project
+
+API_URL = os.getenv("USER_API_URL", "https://fake-json-api.mock.beeceptor.com/users")
+# Upstream request timeout in seconds
+API_TIMEOUT = float(os.getenv("USER_API_TIMEOUT", "10"))
+# How long a fetched user list is served before hitting the upstream again
+CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+# Size of the pooled upstream connection pool
+MAX_CONNECTIONS = int(os.getenv("USER_API_MAX_CONNECTIONS", "100"))
+# Largest page a caller may request with limit=
+MAX_PAGE_SIZE = 1000
+
 
-app = FastAPI()
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def ndjson_lines(objects: List[Dict[str, Any]]) -> Iterator[str]:
+    for obj in objects:
+        yield json.dumps(obj, separators=(",", ":")) + "\n"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    client = httpx.AsyncClient(
+        timeout=API_TIMEOUT,
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+    )
+    app.state.user_cache = UserCache(client, API_URL, CACHE_TTL)
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS for local dev
 app.add_middleware(
@@ -13,12 +71,10 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-API_URL = "https://fake-json-api.mock.beeceptor.com/users"
-
 """
 Description:
-This tool fetches user data from an external mock API (https://fake-json-api.mock.beeceptor.com/users). 
-It returns a complete list of users with their information, So look for the particular string in the array of objects. Then once you find the particular any matching information, filter that particular object to get the details of that particular user. 
+This tool fetches user data from an external mock API (https://fake-json-api.mock.beeceptor.com/users).
+It returns a complete list of users with their information, So look for the particular string in the array of objects. Then once you find the particular any matching information, filter that particular object to get the details of that particular user.
 The data in that filtered object can be used to return any required information of the user, example: "email", "address", "zipcode".
 
 Example usage:
@@ -27,16 +83,38 @@ Example usage:
 
 
 @app.get("/users")
-def get_users(search: str = ""):
-    res = requests.get(API_URL)
-    objects = res.json()
-    filtered = []
+async def get_users(
+    request: Request,
+    search: str = "",
+    fields: str = "",
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = "",
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    match: str = Query("all", pattern="^(all|any)$"),
+):
+    # search matches name, email, address and company; use name:/email:/address:/zip:/company: to target one field.
+    # match=any returns users matching any search word, those matching the most words first.
+    # fields is a comma-separated list of attributes to return, e.g. fields=name,email.
+    # With limit set, pass the returned next_cursor back as cursor= to get the next page.
+    # format=ndjson streams one user per line; the next cursor is sent in the X-Next-Cursor header.
+    offset = decode_cursor(cursor) if cursor else 0
+    try:
+        # Ask for one extra result to know whether there is a next page
+        matches = await request.app.state.user_cache.search(
+            search, limit=None if limit is None else offset + limit + 1, match_any=match == "any"
+        )
+    except (httpx.HTTPError, ValueError) as e:
+        raise HTTPException(status_code=502, detail=f"Upstream user API failed: {e}")
 
-    for obj in objects:
-        name = obj.get("name", "").lower()
-        if search.lower() in name:
-            filtered.append(obj)
+    end = len(matches) if limit is None else offset + limit
+    page = project(matches[offset:end], fields.split(","))
+    next_cursor = encode_cursor(end) if end < len(matches) else None
 
-    return {"results": filtered}
+    if format == "ndjson":
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return StreamingResponse(ndjson_lines(page), media_type="application/x-ndjson", headers=headers)
+    return JSONResponse({"results": page, "next_cursor": next_cursor})
 
 # Run with: uvicorn mcp_server:app --reload
+# Upstream settings can be overridden with USER_API_URL, USER_API_TIMEOUT,
+# USER_CACHE_TTL and USER_API_MAX_CONNECTIONS.
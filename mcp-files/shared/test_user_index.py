@@ -0,0 +1,124 @@
+import copy
+
+import pytest
+
+from user_index import UserIndex, parse_query, project
+
+USERS = [
+    {"id": 1, "name": "Raquel Halvorson", "email": "flossie_maggio@gmail.com",
+     "address": "12 Elm St", "zip": "90210", "company": "Tanaka Group"},
+    {"id": 2, "name": "Bob Raquelson", "email": "bob@example.com",
+     "address": "1 Main St", "zip": "10001", "company": "Silva Group"},
+    {"id": 3, "name": "Ann Smith", "email": "ann@raquel.org",
+     "address": {"street": "Oak Ave", "zipcode": "55555"}, "company": "Patel Group"},
+]
+
+
+def ids(users):
+    return [u["id"] for u in users]
+
+
+def snapshot(index):
+    """Everything a search can observe, deep-copied so later mutation is detectable."""
+    return copy.deepcopy((index._docs, index._text, index._position, index._grams, index._source))
+
+
+def test_empty_query_returns_upstream_order():
+    index = UserIndex().updated(USERS)
+    assert ids(index.search("")) == [1, 2, 3]
+    assert ids(index.search("", limit=2)) == [1, 2]
+
+
+def test_limit_below_one_is_rejected():
+    index = UserIndex().updated(USERS)
+    for query in ("", "raquel"):
+        with pytest.raises(ValueError):
+            index.search(query, limit=0)
+
+
+def test_terms_match_any_default_field_and_all_must_match():
+    index = UserIndex().updated(USERS)
+    assert ids(index.search("raquel")) == [1, 2, 3]
+    assert ids(index.search("raquel halvorson")) == [1]
+    assert ids(index.search("oak")) == [3]
+
+
+def test_field_qualifiers_restrict_the_search():
+    index = UserIndex().updated(USERS)
+    assert ids(index.search("email:raquel")) == [3]
+    assert ids(index.search("name:raquel")) == [1, 2]
+    assert ids(index.search("zip:90210")) == [1]
+    assert ids(index.search("company:tanaka")) == [1]
+    assert ids(index.search('name:"raquel h"')) == [1]
+
+
+def test_unknown_qualifier_is_plain_text():
+    assert parse_query("http://x name:Bob") == [
+        (("name", "email", "address", "company"), "http://x"),
+        (("name",), "bob"),
+    ]
+
+
+def test_short_terms_fall_back_to_a_scan():
+    index = UserIndex().updated(USERS)
+    assert ids(index.search("bo")) == [2]
+
+
+def test_match_any_ranks_by_number_of_matched_terms():
+    users = [
+        {"id": 1, "name": "Ava Tanaka", "company": "Nguyen Group"},
+        {"id": 2, "name": "Lena Garcia", "company": "Tanaka Group"},
+        {"id": 3, "name": "Zoe Tanaka", "company": "Tanaka Group"},
+    ]
+    index = UserIndex().updated(users)
+    assert ids(index.search('tanaka group "tanaka group"', match_any=True)) == [3, 2, 1]
+
+
+def test_updated_adds_removes_and_changes_records():
+    index = UserIndex().updated(USERS)
+    changed = copy.deepcopy(USERS[1:])
+    changed[0]["name"] = "Robert Smith"
+    changed.append({"id": 4, "name": "Raquel New"})
+
+    new = index.updated(changed)
+    assert len(new) == 3
+    assert ids(new.search("raquel")) == [4, 3]
+    assert ids(new.search("robert")) == [2]
+    assert new.search("halvorson") == []
+    assert ids(new.search("")) == [2, 3, 4]
+
+
+def test_updated_leaves_the_old_index_untouched():
+    index = UserIndex().updated(USERS)
+    before = snapshot(index)
+
+    new = index.updated(USERS[1:] + [{"id": 4, "name": "Raquel New"}])
+    newer = new.updated(USERS)
+
+    assert snapshot(index) == before
+    assert ids(index.search("raquel")) == [1, 2, 3]
+    assert ids(new.search("raquel")) == [2, 4, 3]
+    assert ids(newer.search("raquel")) == [1, 2, 3]
+
+
+def test_updated_with_same_list_is_a_no_op():
+    index = UserIndex().updated(USERS)
+    assert index.updated(USERS) is index
+
+
+def test_duplicate_records_are_kept_and_removed_one_at_a_time():
+    dup = {"id": 9, "name": "Twin Person"}
+    index = UserIndex().updated([dup, dict(dup), USERS[0]])
+    assert len(index) == 3
+    assert len(index.search("twin")) == 2
+
+    index = index.updated([dict(dup), USERS[0]])
+    assert len(index) == 2
+    assert len(index.search("twin")) == 1
+
+
+def test_project_keeps_requested_fields():
+    assert project(USERS[:1], ["name", " email", "missing", ""]) == [
+        {"name": "Raquel Halvorson", "email": "flossie_maggio@gmail.com"}
+    ]
+    assert project(USERS, None) == USERS
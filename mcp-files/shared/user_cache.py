@@ -0,0 +1,99 @@
+"""TTL cache for the upstream user list, shared by the user-info servers."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from user_index import UserIndex
+
+# Logs go to stderr; stdout is the JSON-RPC channel of the stdio MCP server
+logger = logging.getLogger(__name__)
+
+# Seconds to wait after a failed fetch before hitting the upstream again (capped at the TTL)
+RETRY_DELAY = 5.0
+
+
+class UserCache:
+    """Caches the upstream user list for `ttl` seconds.
+
+    Concurrent cache misses share a single in-flight upstream fetch instead of
+    each issuing their own request. Once a list has been loaded, an expired
+    entry keeps being served while the refresh runs in the background. Parsing
+    the response and updating the search index happen in a worker thread, and
+    are skipped when the upstream body hasn't changed.
+
+    After a failed fetch the upstream is left alone for RETRY_DELAY seconds:
+    the previous list keeps being served, or, if there is none yet, requests
+    fail fast with the last error.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, url: str, ttl: float):
+        self._client = client
+        self._url = url
+        self._ttl = ttl
+        self._users: Optional[List[Dict[str, Any]]] = None
+        self._digest: Optional[bytes] = None
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self._last_error: Optional[Exception] = None
+        self.index = UserIndex()
+
+    async def get(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        if self._users is not None and now < self._expires_at:
+            return self._users
+        if self._inflight is None:
+            if now < self._retry_at:
+                # Backing off after a failed fetch
+                if self._users is not None:
+                    return self._users
+                raise self._last_error
+            self._inflight = asyncio.create_task(self._refresh())
+            self._inflight.add_done_callback(self._refresh_done)
+        if self._users is not None:
+            # Stale but usable: answer now, the refresh swaps in the new list when ready
+            return self._users
+        # Shield the shared fetch so one cancelled request doesn't cancel it for everyone
+        return await asyncio.shield(self._inflight)
+
+    async def search(self, query: str, limit: Optional[int] = None,
+                     match_any: bool = False) -> List[Dict[str, Any]]:
+        await self.get()
+        return self.index.search(query, limit=limit, match_any=match_any)
+
+    async def _refresh(self) -> List[Dict[str, Any]]:
+        try:
+            resp = await self._client.get(self._url)
+            resp.raise_for_status()
+            digest = hashlib.sha256(resp.content).digest()
+            if digest != self._digest:
+                users, index = await asyncio.to_thread(self._build, resp.content)
+                self._users, self.index, self._digest = users, index, digest
+            self._expires_at = time.monotonic() + self._ttl
+            return self._users
+        except Exception as e:
+            self._last_error = e
+            self._retry_at = time.monotonic() + min(self._ttl, RETRY_DELAY)
+            raise
+        finally:
+            self._inflight = None
+
+    def _build(self, body: bytes) -> Tuple[List[Dict[str, Any]], UserIndex]:
+        data = json.loads(body)
+        if not isinstance(data, list) or not all(isinstance(u, dict) for u in data):
+            raise ValueError("Unexpected response format: expected a JSON list of objects")
+        return data, self.index.updated(data)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None and self._users is not None:
+            # Background refresh failed; the previous list is served until the retry delay passes
+            logger.warning("User list refresh failed, serving cached data: %s", error)
@@ -0,0 +1,246 @@
+"""In-process search index over the upstream user list.
+
+Shared by the FastAPI and FastMCP user-info servers. Each searchable field gets
+a trigram inverted index, so a substring lookup only verifies the handful of
+users whose field contains every trigram of the query instead of scanning the
+whole list.
+
+Query syntax:
+    raquel                 substring match in name, email, address or company
+    raquel halvorson       every term must match (in any field), unless
+                           searching with match_any
+    email:gmail.com        restrict a term to one field
+    name:"raquel halv"     quote terms that contain spaces
+"""
+
+import heapq
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Search field -> user attributes whose values are indexed under it
+FIELDS = {
+    "name": ("name",),
+    "email": ("email",),
+    "address": ("address", "zip", "zipcode", "state", "country"),
+    "zip": ("zip", "zipcode"),
+    "company": ("company",),
+}
+# Fields searched by terms without a field qualifier
+DEFAULT_FIELDS = ("name", "email", "address", "company")
+# Per-field ranking weight; a name hit outranks an address hit
+FIELD_WEIGHTS = {"name": 3.0, "email": 2.0, "address": 1.0, "zip": 1.0, "company": 1.0}
+
+GRAM_SIZE = 3
+
+_TERM_RE = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+
+
+def _flatten(value: Any) -> str:
+    if isinstance(value, dict):
+        return " ".join(_flatten(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_flatten(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def project(users: Iterable[Dict[str, Any]], fields: Optional[Iterable[str]]) -> List[Dict[str, Any]]:
+    """Keep only the given top-level attributes of each user (all of them if fields is empty)."""
+    fields = [f.strip() for f in (fields or ()) if f.strip()]
+    if not fields:
+        return list(users)
+    return [{f: u[f] for f in fields if f in u} for u in users]
+
+
+def parse_query(query: str) -> List[Tuple[Tuple[str, ...], str]]:
+    """Split a query into (fields, lowercase term) pairs."""
+    terms = []
+    for field, quoted, bare in _TERM_RE.findall(query):
+        term = (quoted if quoted else bare).strip().lower()
+        if field and field.lower() not in FIELDS:
+            # Not a qualifier we know (e.g. "http://..."), treat the colon as text
+            term = f"{field}:{term}".lower()
+            field = ""
+        if term:
+            terms.append(((field.lower(),) if field else DEFAULT_FIELDS, term))
+    return terms
+
+
+class UserIndex:
+    """Trigram index over name, email, address and company of a list of user objects."""
+
+    def __init__(self):
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self._keys: Dict[Hashable, int] = {}
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._text: Dict[int, Dict[str, str]] = {}
+        self._position: Dict[int, int] = {}
+        self._grams: Dict[str, Dict[str, Set[int]]] = {field: {} for field in FIELDS}
+        self._next_id = 0
+        # (field, gram) posting sets this index may mutate in place
+        self._owned: Set[Tuple[str, str]] = set()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def updated(self, users: List[Dict[str, Any]]) -> "UserIndex":
+        """Return an index synced with a freshly fetched user list.
+
+        Only users that were added, removed or changed since the previous list
+        are (re)indexed. This index is left untouched: the new one shares its
+        posting sets and copies a set only when it has to change it, so the old
+        index can keep serving searches while the new one is built in another
+        thread. Passing the same list object again returns self.
+        """
+        if users is self._source:
+            return self
+
+        new = UserIndex()
+        new._keys = dict(self._keys)
+        new._docs = dict(self._docs)
+        new._text = dict(self._text)
+        new._grams = {field: dict(postings) for field, postings in self._grams.items()}
+        new._next_id = self._next_id
+        new._sync(users)
+        return new
+
+    def _sync(self, users: List[Dict[str, Any]]) -> None:
+        seen: Counter = Counter()
+        new_keys: Dict[Hashable, Tuple[int, Dict[str, Any]]] = {}
+        for position, user in enumerate(users):
+            fingerprint = json.dumps(user, sort_keys=True, default=str)
+            seen[fingerprint] += 1
+            # Identical records are kept apart by their occurrence number
+            new_keys[(fingerprint, seen[fingerprint])] = (position, user)
+
+        for key in self._keys.keys() - new_keys.keys():
+            self._remove(self._keys.pop(key))
+
+        for key, (position, user) in new_keys.items():
+            doc_id = self._keys.get(key)
+            if doc_id is None:
+                doc_id = self._add(user)
+                self._keys[key] = doc_id
+            self._position[doc_id] = position
+
+        self._source = users
+        # Sets shared with the previous index are only needed while syncing
+        self._owned.clear()
+
+    def search(self, query: str, limit: Optional[int] = None,
+               match_any: bool = False) -> List[Dict[str, Any]]:
+        """Return users matching the query, best matches first.
+
+        By default every term must match; with match_any a user matching any
+        term is returned, ranked by how many terms match and then by how well.
+        An empty query returns all users in upstream order.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        terms = parse_query(query)
+        if not terms:
+            return (self._source or [])[:limit]
+
+        scores: Optional[Dict[int, float]] = None
+        # Number of query terms each document matched (only varies with match_any)
+        matched: Counter = Counter()
+        for fields, term in terms:
+            if match_any:
+                term_scores = self._match(fields, term, None)
+                if scores is None:
+                    scores = {}
+                for d, s in term_scores.items():
+                    scores[d] = scores.get(d, 0.0) + s
+                    matched[d] += 1
+                continue
+            term_scores = self._match(fields, term, scores)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {d: scores[d] + s for d, s in term_scores.items()}
+            if not scores:
+                return []
+
+        def rank(doc_id: int) -> Tuple[int, float, int]:
+            return (-matched[doc_id], -scores[doc_id], self._position[doc_id])
+
+        if limit is None:
+            ordered = sorted(scores, key=rank)
+        else:
+            ordered = heapq.nsmallest(limit, scores, key=rank)
+        return [self._docs[d] for d in ordered]
+
+    def _match(self, fields: Iterable[str], term: str,
+               restrict: Optional[Dict[int, float]]) -> Dict[int, float]:
+        """Score each document containing `term` in any of `fields`."""
+        scores: Dict[int, float] = {}
+        term_grams = _grams(term)
+        for field in fields:
+            if term_grams:
+                postings = sorted((self._grams[field].get(g, set()) for g in term_grams), key=len)
+                candidates = set.intersection(*postings)
+            else:
+                # Terms shorter than a trigram can't use the index
+                candidates = self._docs.keys()
+            if restrict is not None:
+                candidates = [d for d in candidates if d in restrict]
+
+            weight = FIELD_WEIGHTS[field]
+            for doc_id in candidates:
+                text = self._text[doc_id][field]
+                pos = text.find(term)
+                if pos < 0:
+                    # Trigram candidates can be false positives
+                    continue
+                if text == term:
+                    score = 4.0
+                elif pos == 0 or not text[pos - 1].isalnum():
+                    score = 2.0
+                else:
+                    score = 1.0
+                score *= weight
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        return scores
+
+    def _bucket(self, field: str, gram: str, create: bool) -> Optional[Set[int]]:
+        """Posting set for a gram that is safe to mutate (copied if shared with an older index)."""
+        postings = self._grams[field]
+        bucket = postings.get(gram)
+        if bucket is None:
+            if not create:
+                return None
+            bucket = postings[gram] = set()
+            self._owned.add((field, gram))
+        elif (field, gram) not in self._owned:
+            bucket = postings[gram] = set(bucket)
+            self._owned.add((field, gram))
+        return bucket
+
+    def _add(self, user: Dict[str, Any]) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = user
+        text = {}
+        for field, attrs in FIELDS.items():
+            value = " ".join(_flatten(user.get(a)) for a in attrs if user.get(a) is not None).lower()
+            text[field] = value
+            for gram in _grams(value):
+                self._bucket(field, gram, create=True).add(doc_id)
+        self._text[doc_id] = text
+        return doc_id
+
+    def _remove(self, doc_id: int) -> None:
+        for field, value in self._text.pop(doc_id).items():
+            for gram in _grams(value):
+                bucket = self._bucket(field, gram, create=False)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._grams[field][gram]
+        del self._docs[doc_id]